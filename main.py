@@ -1,166 +1,350 @@
+from bisect import bisect_left, insort
 from collections import UserDict
-from datetime import datetime, timedelta
-import pickle
+import copyreg
+import os
+from datetime import date, datetime, timedelta
+import sys
+
+
+_DAYS_BEFORE_MONTH = (0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+
+
+def _is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _to_ordinal(year, month, day):
+    # Same numbering as date.toordinal(): 01.01.0001 is day 1
+    y = year - 1
+    ordinal = y * 365 + y // 4 - y // 100 + y // 400 + _DAYS_BEFORE_MONTH[month] + day
+    if month > 2 and _is_leap(year):
+        ordinal += 1
+    return ordinal
+
+
+def _next_birthday_ordinal(birthday_date, today):
+    month, day = birthday_date.month, birthday_date.day
+    year = today.year if (month, day) >= (today.month, today.day) else today.year + 1
+    if month == 2 and day == 29 and not _is_leap(year):
+        day = 28
+    return _to_ordinal(year, month, day)
 
 
 class Field:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
     def __str__(self):
         return str(self.value)
 
+    def __reduce__(self):
+        return (self._restore, (self.value,))
+
+    @classmethod
+    def _restore(cls, value):
+        # Saved values were validated when entered; don't reject them when a
+        # validator gets stricter later
+        field = cls.__new__(cls)
+        field.__setstate__({"value": value})
+        return field
+
+    def __setstate__(self, state):
+        # Books saved before __reduce__ existed carry the instance __dict__
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
 
 class Name(Field):
+    __slots__ = ("_key",)
+
     def __init__(self, value):
         if not value or not value.strip():
             raise ValueError("Name cannot be empty")
         super().__init__(value.strip())
+        self._key = sys.intern(self.value.casefold())
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if "_key" not in state:
+            self._key = sys.intern(self.value.casefold())
 
 
 class Phone(Field):
+    __slots__ = ()
+
     def __init__(self, value):
-        if not self._validate_phone(value):
-            raise ValueError("Phone number must contain exactly 10 digits")
+        self.validate(value)
         super().__init__(value)
-    
-    def _validate_phone(self, phone):
-        return phone.isdigit() and len(phone) == 10
+
+    @staticmethod
+    def validate(phone):
+        if not (len(phone) == 10 and phone.isascii() and phone.isdigit()):
+            raise ValueError("Phone number must contain exactly 10 digits")
 
 
 class Birthday(Field):
+    __slots__ = ("date",)
+
     def __init__(self, value):
         try:
-            datetime.strptime(value, "%d.%m.%Y")
+            self.date = self._parse_date(value)
             super().__init__(value)
         except ValueError:
             raise ValueError("Invalid date format. Use DD.MM.YYYY")
 
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if "date" not in state:
+            self.date = self._load_date(self.value)
+
+    @classmethod
+    def _load_date(cls, value):
+        # Saved values passed the old strptime check, which also allowed
+        # unpadded dates such as 1.1.2000
+        try:
+            return cls._parse_date(value)
+        except ValueError:
+            return datetime.strptime(value, "%d.%m.%Y").date()
+
+    @staticmethod
+    def _parse_date(value):
+        if len(value) != 10 or value[2] != "." or value[5] != ".":
+            raise ValueError(value)
+        digits = value[0:2] + value[3:5] + value[6:10]
+        if not (digits.isascii() and digits.isdigit()):
+            raise ValueError(value)
+        return date(int(value[6:10]), int(value[3:5]), int(value[0:2]))
+
 
 class Record:
+    __slots__ = ("name", "phones", "birthday", "_str_cache", "_books")
+
     def __init__(self, name):
         self.name = Name(name)
-        self.phones = []
+        self.phones = {}
         self.birthday = None
+        self._str_cache = None
+        # Books holding this record, by id(), so each can update its birthday index
+        self._books = {}
 
     def add_phone(self, phone):
-        if self.find_phone(phone):
+        if phone in self.phones:
             raise ValueError(f"Phone {phone} already exists")
-        phone_obj = Phone(phone)
-        self.phones.append(phone_obj)
+        self.phones[phone] = Phone(phone)
+        self._str_cache = None
 
     def remove_phone(self, phone):
-        phone_obj = self.find_phone(phone)
-        if phone_obj:
-            self.phones.remove(phone_obj)
-        else:
+        if self.phones.pop(phone, None) is None:
             raise ValueError(f"Phone {phone} not found")
+        self._str_cache = None
 
     def edit_phone(self, old_phone, new_phone):
-        phone_obj = self.find_phone(old_phone)
-        if phone_obj:
-            new_phone_obj = Phone(new_phone)
-            index = self.phones.index(phone_obj)
-            self.phones[index] = new_phone_obj
-        else:
+        phone_obj = self.phones.get(old_phone)
+        if phone_obj is None:
             raise ValueError(f"Phone {old_phone} not found")
+        if new_phone != old_phone and new_phone in self.phones:
+            raise ValueError(f"Phone {new_phone} already exists")
+        Phone.validate(new_phone)
+        # Re-keying moves the edited number to the end of the listing
+        del self.phones[old_phone]
+        phone_obj.value = new_phone
+        self.phones[new_phone] = phone_obj
+        self._str_cache = None
 
     def find_phone(self, phone):
-        for phone_obj in self.phones:
-            if phone_obj.value == phone:
-                return phone_obj
-        return None
+        return self.phones.get(phone)
 
     def add_birthday(self, birthday):
         self.birthday = Birthday(birthday)
+        self._str_cache = None
+        for book in self._books.values():
+            book._update_bday(self.name._key, self)
+
+    def __reduce__(self):
+        state = {
+            "name": self.name.value,
+            "phones": list(self.phones),
+            "birthday": self.birthday.value if self.birthday else None,
+        }
+        return (copyreg.__newobj__, (self.__class__,), state)
+
+    def __setstate__(self, state):
+        # Books saved before __reduce__ existed carry Field objects; books
+        # saved while Record was rebuilt through __init__ have no name here
+        name = state.get("name")
+        if isinstance(name, str):
+            name = Name._restore(name)
+        if name is not None:
+            self.name = name
+        self.phones = {}
+        for phone in state.get("phones", []):
+            if not isinstance(phone, Phone):
+                phone = Phone._restore(phone)
+            self.phones[phone.value] = phone
+        birthday = state.get("birthday")
+        if isinstance(birthday, str):
+            birthday = Birthday._restore(birthday)
+        self.birthday = birthday
+        self._str_cache = None
+        self._books = {}
 
     def __str__(self):
-        phones_str = "; ".join([phone.value for phone in self.phones])
-        birthday_str = f", birthday: {self.birthday.value}" if self.birthday else ""
-        return f"Contact name: {self.name.value}, phones: {phones_str}{birthday_str}"
+        if self._str_cache is None:
+            phones_str = "; ".join(self.phones)
+            birthday_str = f", birthday: {self.birthday.value}" if self.birthday else ""
+            self._str_cache = f"Contact name: {self.name.value}, phones: {phones_str}{birthday_str}"
+        return self._str_cache
 
 
 class AddressBook(UserDict):
-    
+
+    def __init__(self, *args, **kwargs):
+        # Sorted (next birthday ordinal, key) pairs, built lazily for one day
+        self._bday_index = None
+        self._bday_ords = {}
+        self._bday_today = None
+        # Bumped by every checkpoint; the journal records the one it follows
+        self.journal_generation = 0
+        # Notes about records merged while loading an older book, for main to show
+        self.merge_notes = []
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key, record):
+        # All writes go through here so the birthday index stays in sync
+        previous = self.data.get(key)
+        if previous is not None and previous is not record:
+            previous._books.pop(id(self), None)
+        self.data[key] = record
+        record._books[id(self)] = self
+        self._update_bday(key, record)
+
+    def __delitem__(self, key):
+        self.data.pop(key)._books.pop(id(self), None)
+        self._remove_bday(key)
+
+    def __copy__(self):
+        # The copy shares the records but needs its own birthday index
+        book = self.__class__()
+        book.update(self.data)
+        book.journal_generation = self.journal_generation
+        return book
+
     def add_record(self, record):
-        self.data[record.name.value] = record
+        self[record.name._key] = record
 
     def find(self, name):
-        return self.data.get(name)
+        return self.data.get(sys.intern(name.strip().casefold()))
 
     def delete(self, name):
-        if name in self.data:
-            del self.data[name]
+        key = name.strip().casefold()
+        if key in self.data:
+            del self[key]
         else:
             raise ValueError(f"Record {name} not found")
 
+    def __getstate__(self):
+        return {"data": self.data, "journal_generation": self.journal_generation}
+
+    def __setstate__(self, state):
+        # Older books were keyed by the display name, so names differing only
+        # by case were separate records; merge them instead of dropping one
+        self.data = {}
+        self.merge_notes = []
+        for record in state["data"].values():
+            key = record.name._key
+            existing = self.data.get(key)
+            if existing is None:
+                self.data[key] = record
+                record._books[id(self)] = self
+                continue
+            self.merge_notes.append(f"Merged contact '{record.name.value}' into '{existing.name.value}'.")
+            if existing.birthday is None:
+                existing.birthday = record.birthday
+            elif record.birthday is not None and record.birthday.value != existing.birthday.value:
+                self.merge_notes.append(
+                    f"Kept birthday {existing.birthday.value}, dropped {record.birthday.value}."
+                )
+            for phone, phone_obj in record.phones.items():
+                existing.phones.setdefault(phone, phone_obj)
+            existing._str_cache = None
+        self._bday_index = None
+        self._bday_ords = {}
+        self._bday_today = None
+        self.journal_generation = state.get("journal_generation", 0)
+
+    def _remove_bday(self, key):
+        ordinal = self._bday_ords.pop(key, None)
+        if ordinal is not None:
+            del self._bday_index[bisect_left(self._bday_index, (ordinal, key))]
+
+    def _update_bday(self, key, record):
+        if self._bday_index is None:
+            return
+        if self.data.get(key) is not record:
+            # Stored under some other key; let the next query rebuild
+            self._bday_index = None
+            return
+        self._remove_bday(key)
+        if record.birthday:
+            ordinal = _next_birthday_ordinal(record.birthday.date, self._bday_today)
+            self._bday_ords[key] = ordinal
+            insort(self._bday_index, (ordinal, key))
+
+    def _rebuild_bday_index(self, today):
+        self._bday_today = today
+        self._bday_ords = {
+            key: _next_birthday_ordinal(record.birthday.date, today)
+            for key, record in self.data.items()
+            if record.birthday
+        }
+        self._bday_index = sorted((ordinal, key) for key, ordinal in self._bday_ords.items())
+
     def get_upcoming_birthdays(self):
         today = datetime.today().date()
+        today_ord = today.toordinal()
+        if self._bday_index is None or self._bday_today != today:
+            self._rebuild_bday_index(today)
+        # Congratulation dates always fall within today .. today + 9
+        formatted_dates = [
+            (today + timedelta(days=i)).strftime("%d.%m.%Y") for i in range(10)
+        ]
         upcoming = []
         
-        for record in self.data.values():
-            if not record.birthday:
-                continue
-            
-            birthday_date = datetime.strptime(record.birthday.value, "%d.%m.%Y").date()
-            birthday_this_year = birthday_date.replace(year=today.year)
-            
-            if birthday_this_year < today:
-                birthday_this_year = birthday_date.replace(year=today.year + 1)
+        # Every indexed birthday is on or after today, so only the upper bound is needed
+        end = bisect_left(self._bday_index, (today_ord + 8,))
+        for birthday_ord, key in self._bday_index[:end]:
+            days_until = birthday_ord - today_ord
+            weekday = (birthday_ord + 6) % 7
             
-            days_until = (birthday_this_year - today).days
+            if weekday == 5:  # Saturday
+                days_until += 2
+            elif weekday == 6:  # Sunday
+                days_until += 1
             
-            if 0 <= days_until <= 7:
-                congratulation_date = birthday_this_year
-                
-                if birthday_this_year.weekday() == 5:  # Saturday
-                    congratulation_date += timedelta(days=2)
-                elif birthday_this_year.weekday() == 6:  # Sunday
-                    congratulation_date += timedelta(days=1)
-                
-                upcoming.append({
-                    "name": record.name.value,
-                    "birthday": congratulation_date.strftime("%d.%m.%Y")
-                })
+            upcoming.append({
+                "name": self.data[key].name.value,
+                "birthday": formatted_dates[days_until]
+            })
         
         return upcoming
 
     def __str__(self):
         if not self.data:
             return "Address book is empty"
-        
-        result = []
-        for record in self.data.values():
-            result.append(str(record))
-        return "\n".join(result)
-
-
-def input_error(func):
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except ValueError as e:
-            if "not enough values to unpack" in str(e):
-                return "Not enough arguments provided."
-            return str(e)
-        except IndexError:
-            return "Not enough arguments provided."
-        except KeyError:
-            return "Contact not found."
-        except AttributeError:
-            return "Contact not found."
-    return wrapper
+        return "\n".join(str(record) for record in self.data.values())
 
 
 def parse_input(user_input):
-    if not user_input:
+    parts = user_input.split(maxsplit=1)
+    if not parts:
         return None, []
-    cmd, *args = user_input.split()
-    cmd = cmd.strip().lower()
+    cmd = sys.intern(parts[0].lower())
+    args = parts[1].split() if len(parts) > 1 else []
     return cmd, args
 
 
-@input_error
 def add_contact(args, book: AddressBook):
     name, phone, *_ = args
     record = book.find(name)
@@ -173,7 +357,6 @@ def add_contact(args, book: AddressBook):
     return message
 
 
-@input_error
 def change_contact(args, book: AddressBook):
     name, old_phone, new_phone, *_ = args
     record = book.find(name)
@@ -181,20 +364,17 @@ def change_contact(args, book: AddressBook):
     return "Contact updated."
 
 
-@input_error
 def show_phone(args, book: AddressBook):
     name = args[0]
     record = book.find(name)
-    phones_str = "; ".join([phone.value for phone in record.phones])
+    phones_str = "; ".join(record.phones)
     return phones_str if phones_str else "No phones available."
 
 
-@input_error
 def show_all(book: AddressBook):
     return str(book)
 
 
-@input_error
 def add_birthday(args, book: AddressBook):
     name, birthday, *_ = args
     record = book.find(name)
@@ -202,7 +382,6 @@ def add_birthday(args, book: AddressBook):
     return "Birthday added."
 
 
-@input_error
 def show_birthday(args, book: AddressBook):
     name = args[0]
     record = book.find(name)
@@ -211,7 +390,6 @@ def show_birthday(args, book: AddressBook):
     return f"{name}'s birthday: {record.birthday.value}"
 
 
-@input_error
 def birthdays(args, book: AddressBook):
     upcoming = book.get_upcoming_birthdays()
     if not upcoming:
@@ -222,17 +400,90 @@ def birthdays(args, book: AddressBook):
     return "\n".join(result)
 
 
-def save_data(book, filename="addressbook.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
+# Commands that change the book; they are journaled and replayed on load
+JOURNALED_COMMANDS = {
+    "add": add_contact,
+    "change": change_contact,
+    "add-birthday": add_birthday,
+}
+CHECKPOINT_INTERVAL = 100
+JOURNAL_HEADER = "checkpoint"
+BOOK_FILENAME = "addressbook.pkl"
+
 
+def save_data(book, filename=BOOK_FILENAME):
+    import pickle
+
+    data = pickle.dumps(book, protocol=pickle.HIGHEST_PROTOCOL)
+    # Write a sibling file and swap it in, so a crash never leaves a partial book
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def load_data(filename=BOOK_FILENAME):
+    import mmap
+    import pickle
 
-def load_data(filename="addressbook.pkl"):
     try:
         with open(filename, "rb") as f:
-            return pickle.load(f)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                book = pickle.loads(mm)
+    except FileNotFoundError:
+        book = AddressBook()
+    replay_journal(book, journal_path(filename))
+    return book
+
+
+def journal_path(filename):
+    return os.path.splitext(filename)[0] + ".journal"
+
+
+def write_journal(journal, command, args):
+    journal.write("\t".join([command, *args]) + "\n")
+
+
+def journal_generation(journal_filename):
+    # Journals written before generations existed have no header: generation 0
+    try:
+        with open(journal_filename, encoding="utf-8") as f:
+            first_line = f.readline()
+    except FileNotFoundError:
+        return 0
+    command, _, generation = first_line.rstrip("\n").partition("\t")
+    return int(generation) if command == JOURNAL_HEADER else 0
+
+
+def replay_journal(book, journal_filename):
+    # A journal from an older generation is already part of the saved book:
+    # the process stopped between saving the book and truncating the journal
+    if journal_generation(journal_filename) != book.journal_generation:
+        return
+    try:
+        with open(journal_filename, encoding="utf-8") as f:
+            for line in f:
+                command, *args = line.rstrip("\n").split("\t")
+                handler = JOURNALED_COMMANDS.get(command)
+                if handler is None:
+                    continue
+                try:
+                    handler(args, book)
+                except (ValueError, IndexError, KeyError, AttributeError):
+                    # Failed the same way when it was first entered
+                    pass
     except FileNotFoundError:
-        return AddressBook()
+        pass
+
+
+def checkpoint(book, journal, filename=BOOK_FILENAME):
+    # The journal is only dropped once the new book is safely on disk
+    book.journal_generation += 1
+    save_data(book, filename)
+    journal.truncate(0)
+    write_journal(journal, JOURNAL_HEADER, [str(book.journal_generation)])
 
 
 def help_text() -> str:
@@ -251,47 +502,64 @@ def help_text() -> str:
     )
 
 
-def main():
-    book = load_data()
-    print("Welcome to the assistant bot!")
-    while True:
-        user_input = input("Enter a command: ")
-        command, args = parse_input(user_input)
-
-        if command in ["close", "exit"]:
-            save_data(book)
-            print("Good bye!")
-            break
-
-        elif command == "hello":
-            print("How can I help you?")
-
-        elif command == "add":
-            print(add_contact(args, book))
-
-        elif command == "change":
-            print(change_contact(args, book))
-
-        elif command == "phone":
-            print(show_phone(args, book))
-
-        elif command == "all":
-            print(show_all(book))
-
-        elif command == "add-birthday":
-            print(add_birthday(args, book))
-
-        elif command == "show-birthday":
-            print(show_birthday(args, book))
-
-        elif command == "birthdays":
-            print(birthdays(args, book))
-
-        elif command == "help":
-            print(help_text())
+EXIT_COMMANDS = frozenset(("close", "exit"))
+COMMANDS = {
+    "hello": lambda args, book: "How can I help you?",
+    "add": add_contact,
+    "change": change_contact,
+    "phone": show_phone,
+    "all": lambda args, book: show_all(book),
+    "add-birthday": add_birthday,
+    "show-birthday": show_birthday,
+    "birthdays": birthdays,
+    "help": lambda args, book: help_text(),
+}
+
+
+def main(filename=BOOK_FILENAME):
+    book = load_data(filename)
+    for note in book.merge_notes:
+        print(note)
+    with open(journal_path(filename), "a", buffering=1, encoding="utf-8") as journal:
+        if journal_generation(journal.name) != book.journal_generation:
+            # Start a journal for this book before appending to a stale one
+            checkpoint(book, journal, filename)
+        journaled = 0
+        print("Welcome to the assistant bot!")
+        while True:
+            user_input = input("Enter a command: ")
+            command, args = parse_input(user_input)
+
+            if command in EXIT_COMMANDS:
+                checkpoint(book, journal, filename)
+                print("Good bye!")
+                break
+
+            handler = COMMANDS.get(command)
+            if handler is None:
+                print("Invalid command.")
+                continue
 
-        else:
-            print("Invalid command.")
+            try:
+                print(handler(args, book))
+            except ValueError as e:
+                if "not enough values to unpack" in str(e):
+                    print("Not enough arguments provided.")
+                else:
+                    print(e)
+            except IndexError:
+                print("Not enough arguments provided.")
+            except KeyError:
+                print("Contact not found.")
+            except AttributeError:
+                print("Contact not found.")
+
+            if command in JOURNALED_COMMANDS:
+                write_journal(journal, command, args)
+                journaled += 1
+                if journaled >= CHECKPOINT_INTERVAL:
+                    checkpoint(book, journal, filename)
+                    journaled = 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,360 @@
+import copy
+import copyreg
+import os
+import pickle
+import tempfile
+from datetime import date, timedelta
+import unittest
+from unittest import mock
+
+import main
+
+
+class _Baseline:
+    """Object pickled the way the baseline classes were: class plus __dict__."""
+
+    def __init__(self, cls, **state):
+        self.cls = cls
+        self.state = state
+
+    @property
+    def __class__(self):
+        # Lets pickle emit NEWOBJ for the real class, as it did for baseline books
+        return self.cls
+
+
+class _BaselinePickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        if type(obj) is _Baseline:
+            return (copyreg.__newobj__, (obj.cls,), obj.state)
+        return NotImplemented
+
+
+def baseline_record(name, phones=(), birthday=None):
+    return _Baseline(
+        main.Record,
+        name=_Baseline(main.Name, value=name),
+        phones=[_Baseline(main.Phone, value=phone) for phone in phones],
+        birthday=_Baseline(main.Birthday, value=birthday) if birthday else None,
+    )
+
+
+def baseline_book(*records):
+    return _Baseline(
+        main.AddressBook,
+        data={record.state["name"].state["value"]: record for record in records},
+    )
+
+
+class RecordTest(unittest.TestCase):
+    def setUp(self):
+        self.record = main.Record("Ann")
+        for phone in ("1111111111", "2222222222", "3333333333"):
+            self.record.add_phone(phone)
+
+    def test_edit_phone_updates_the_phone_in_place(self):
+        phone = self.record.find_phone("2222222222")
+        self.record.edit_phone("2222222222", "4444444444")
+        self.assertIs(self.record.find_phone("4444444444"), phone)
+        self.assertEqual(phone.value, "4444444444")
+        self.assertIsNone(self.record.find_phone("2222222222"))
+        self.assertEqual(list(self.record.phones), ["1111111111", "3333333333", "4444444444"])
+        self.assertEqual(str(self.record), "Contact name: Ann, phones: 1111111111; 3333333333; 4444444444")
+
+    def test_edit_phone_rejects_invalid_and_duplicate_numbers(self):
+        for old_phone, new_phone, message in (
+            ("9999999999", "1234567890", "Phone 9999999999 not found"),
+            ("1111111111", "2222222222", "Phone 2222222222 already exists"),
+            ("1111111111", "12", "Phone number must contain exactly 10 digits"),
+            ("1111111111", "١٢٣٤٥٦٧٨٩٠", "Phone number must contain exactly 10 digits"),
+        ):
+            with self.assertRaisesRegex(ValueError, message):
+                self.record.edit_phone(old_phone, new_phone)
+        self.assertEqual(list(self.record.phones), ["1111111111", "2222222222", "3333333333"])
+
+
+class LoadDataTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "addressbook.pkl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_baseline(self, *records):
+        with open(self.filename, "wb") as f:
+            _BaselinePickler(f, protocol=4).dump(baseline_book(*records))
+
+    def test_baseline_book_with_unpadded_birthday_loads(self):
+        self.write_baseline(baseline_record("John", ["1234567890"], "1.1.2000"))
+        record = main.load_data(self.filename).find("John")
+        self.assertEqual(record.birthday.value, "1.1.2000")
+        self.assertEqual(record.birthday.date, date(2000, 1, 1))
+        self.assertEqual(list(record.phones), ["1234567890"])
+
+    def test_saved_values_are_not_revalidated_on_reload(self):
+        # isdigit() accepted Arabic-Indic digits before phones were limited to ASCII
+        self.write_baseline(baseline_record("John", ["١٢٣٤٥٦٧٨٩٠"], "1.1.2000"))
+        book = main.load_data(self.filename)
+        main.save_data(book, self.filename)
+        record = main.load_data(self.filename).find("John")
+        self.assertEqual(list(record.phones), ["١٢٣٤٥٦٧٨٩٠"])
+        self.assertEqual(record.birthday.date, date(2000, 1, 1))
+        self.assertEqual(str(record), "Contact name: John, phones: ١٢٣٤٥٦٧٨٩٠, birthday: 1.1.2000")
+
+    def test_baseline_names_differing_by_case_are_merged(self):
+        self.write_baseline(
+            baseline_record("John", ["1111111111", "2222222222"], "01.01.2000"),
+            baseline_record("john", ["2222222222", "3333333333"]),
+            baseline_record("JOHN", [], "02.02.2002"),
+        )
+        book = main.load_data(self.filename)
+        self.assertEqual(
+            str(book), "Contact name: John, phones: 1111111111; 2222222222; 3333333333, birthday: 01.01.2000"
+        )
+        self.assertEqual(book.merge_notes, [
+            "Merged contact 'john' into 'John'.",
+            "Merged contact 'JOHN' into 'John'.",
+            "Kept birthday 01.01.2000, dropped 02.02.2002.",
+        ])
+        main.save_data(book, self.filename)
+        self.assertEqual(main.load_data(self.filename).merge_notes, [])
+
+    def test_main_shows_merge_notes(self):
+        self.write_baseline(baseline_record("John"), baseline_record("john"))
+        with mock.patch("builtins.input", side_effect=["exit"]), \
+                mock.patch("builtins.print") as print_:
+            main.main(self.filename)
+        self.assertEqual(print_.call_args_list[0].args, ("Merged contact 'john' into 'John'.",))
+
+    def test_book_with_records_rebuilt_through_init_loads(self):
+        # Layout written while Record.__reduce__ passed the name to __init__
+        class Pickler(pickle.Pickler):
+            def reducer_override(self, obj):
+                if isinstance(obj, main.Record):
+                    state = {"phones": list(obj.phones), "birthday": None}
+                    return (main.Record, (obj.name.value,), state)
+                return NotImplemented
+
+        book = main.AddressBook()
+        record = main.Record("Ann")
+        record.add_phone("1234567890")
+        book.add_record(record)
+        with open(self.filename, "wb") as f:
+            Pickler(f).dump(book)
+        self.assertEqual(str(main.load_data(self.filename)), "Contact name: Ann, phones: 1234567890")
+
+    def test_round_trip(self):
+        book = main.AddressBook()
+        record = main.Record("Ann")
+        record.add_phone("1234567890")
+        record.add_phone("0987654321")
+        record.add_birthday("29.02.2000")
+        book.add_record(record)
+        book.add_record(main.Record("Bob"))
+        main.save_data(book, self.filename)
+        loaded = main.load_data(self.filename)
+        self.assertEqual(str(loaded), str(book))
+        self.assertEqual(loaded.find("ann").name._key, "ann")
+
+
+class UpcomingBirthdaysTest(unittest.TestCase):
+    today = date(2025, 6, 11)
+
+    def setUp(self):
+        self.book = main.AddressBook()
+        self.set_today(self.today)
+
+    def set_today(self, today):
+        class FixedDateTime(main.datetime):
+            @classmethod
+            def today(cls):
+                return cls(today.year, today.month, today.day)
+
+        patcher = mock.patch("main.datetime", FixedDateTime)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def birthday_in(self, days):
+        return (self.today + timedelta(days=days)).replace(year=1990).strftime("%d.%m.%Y")
+
+    def upcoming(self, today, *birthdays):
+        self.set_today(today)
+        for i, birthday in enumerate(birthdays):
+            record = main.Record(f"P{i}")
+            record.add_birthday(birthday)
+            self.book.add_record(record)
+        return [item["birthday"] for item in self.book.get_upcoming_birthdays()]
+
+    def test_leap_day_birthday_in_non_leap_year_falls_on_28_february(self):
+        self.assertEqual(self.upcoming(date(2025, 2, 27), "29.02.2000"), ["28.02.2025"])
+
+    def test_leap_day_birthday_after_28_february_waits_for_next_year(self):
+        # 28.02.2026 is 364 days away
+        self.assertEqual(self.upcoming(date(2025, 3, 1), "29.02.2000"), [])
+
+    def test_leap_day_birthday_in_leap_year(self):
+        self.assertEqual(self.upcoming(date(2028, 2, 25), "29.02.2000"), ["29.02.2028"])
+
+    def test_year_end_wraps_into_next_year(self):
+        self.assertEqual(
+            self.upcoming(date(2025, 12, 29), "28.12.1990", "31.12.1990", "02.01.1990", "03.01.1990"),
+            ["31.12.2025", "02.01.2026", "05.01.2026"],
+        )
+
+    def test_index_is_rebuilt_when_the_day_changes(self):
+        self.assertEqual(self.upcoming(date(2025, 12, 27), "27.12.1990", "04.01.1990"), ["29.12.2025"])
+        self.set_today(date(2025, 12, 28))
+        self.assertEqual(
+            [item["birthday"] for item in self.book.get_upcoming_birthdays()], ["05.01.2026"]
+        )
+
+    def record(self, name, days):
+        record = main.Record(name)
+        record.add_birthday(self.birthday_in(days))
+        return record
+
+    def names(self):
+        return sorted(item["name"] for item in self.book.get_upcoming_birthdays())
+
+    def test_index_follows_add_delete_and_add_birthday(self):
+        self.book.add_record(self.record("Ann", 1))
+        self.book.add_record(self.record("Bob", 30))
+        self.assertEqual(self.names(), ["Ann"])
+        self.book.find("Bob").add_birthday(self.birthday_in(2))
+        self.book.add_record(self.record("Cid", 3))
+        self.book.delete("Ann")
+        self.assertEqual(self.names(), ["Bob", "Cid"])
+
+    def test_index_follows_mapping_api(self):
+        self.book.add_record(self.record("Ann", 1))
+        self.assertEqual(self.names(), ["Ann"])
+        self.book["bob"] = self.record("Bob", 2)
+        self.book.update(cid=self.record("Cid", 3))
+        del self.book["ann"]
+        self.assertEqual(self.names(), ["Bob", "Cid"])
+        self.book.pop("bob")
+        self.assertEqual(self.names(), ["Cid"])
+
+    def test_copies_keep_separate_indexes(self):
+        self.book.add_record(self.record("Ann", 1))
+        self.assertEqual(self.names(), ["Ann"])
+        for other in (copy.copy(self.book), self.book.copy()):
+            other.add_record(self.record("Zed", 2))
+            self.assertEqual(sorted(item["name"] for item in other.get_upcoming_birthdays()), ["Ann", "Zed"])
+            self.assertEqual(self.names(), ["Ann"])
+
+    def test_record_shared_by_two_books_updates_both(self):
+        other = main.AddressBook()
+        record = main.Record("Ann")
+        self.book.add_record(record)
+        other.add_record(record)
+        self.assertEqual(self.names(), [])
+        self.assertEqual(other.get_upcoming_birthdays(), [])
+        record.add_birthday(self.birthday_in(1))
+        self.assertEqual(self.names(), ["Ann"])
+        self.assertEqual([item["name"] for item in other.get_upcoming_birthdays()], ["Ann"])
+        other.delete("Ann")
+        record.add_birthday(self.birthday_in(2))
+        self.assertEqual(self.names(), ["Ann"])
+
+    def test_weekend_birthday_moves_to_monday(self):
+        # today is Wednesday 11.06.2025, so offsets 3 and 4 are the weekend
+        for days in range(8):
+            self.book.add_record(self.record(f"P{days}", days))
+        result = {item["name"]: item["birthday"] for item in self.book.get_upcoming_birthdays()}
+        expected = {}
+        for days in range(8):
+            birthday = self.today + timedelta(days=days)
+            shift = {5: 2, 6: 1}.get(birthday.weekday(), 0)
+            expected[f"P{days}"] = (birthday + timedelta(days=shift)).strftime("%d.%m.%Y")
+        self.assertEqual(result, expected)
+        self.assertEqual(result["P3"], "16.06.2025")
+        self.assertEqual(result["P4"], "16.06.2025")
+        self.assertEqual(result["P2"], "13.06.2025")
+        self.assertEqual(result["P5"], "16.06.2025")
+
+
+class SaveDataTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "addressbook.pkl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_failed_save_keeps_previous_book(self):
+        book = main.AddressBook()
+        book.add_record(main.Record("Ann"))
+        main.save_data(book, self.filename)
+        book.add_record(main.Record("Bob"))
+        with mock.patch("main.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                main.save_data(book, self.filename)
+        self.assertEqual(list(main.load_data(self.filename).data), ["ann"])
+
+    def test_save_leaves_no_temporary_file(self):
+        main.save_data(main.AddressBook(), self.filename)
+        self.assertEqual(os.listdir(self.tmp.name), ["addressbook.pkl"])
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "addressbook.pkl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_session(self, *commands):
+        with mock.patch("builtins.input", side_effect=commands), \
+                mock.patch("builtins.print"):
+            try:
+                main.main(self.filename)
+            except StopIteration:
+                pass  # input ran out: the session was killed without exit
+
+    def test_killed_session_is_replayed_from_journal(self):
+        self.run_session(
+            "add Ann 1234567890",
+            "add Ann 12",
+            "change Ann 1234567890 0987654321",
+            "add-birthday Ann 01.01.2000",
+        )
+        self.assertFalse(os.path.exists(self.filename))
+        record = main.load_data(self.filename).find("Ann")
+        self.assertEqual(str(record), "Contact name: Ann, phones: 0987654321, birthday: 01.01.2000")
+
+    def test_exit_checkpoints_and_clears_journal(self):
+        self.run_session("add Ann 1234567890", "exit")
+        with open(main.journal_path(self.filename), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "checkpoint\t1\n")
+        book = main.load_data(self.filename)
+        self.assertEqual(list(book.data), ["ann"])
+        self.assertEqual(book.journal_generation, 1)
+
+    def test_journal_is_not_replayed_over_its_own_checkpoint(self):
+        save_data = main.save_data
+
+        def save_then_die(book, filename):
+            save_data(book, filename)
+            raise KeyboardInterrupt  # killed before the journal is truncated
+
+        with mock.patch("main.save_data", save_then_die):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_session("add Ann 1111111111", "change Ann 1111111111 2222222222", "exit")
+        self.assertEqual(list(main.load_data(self.filename).find("Ann").phones), ["2222222222"])
+
+        self.run_session("add Ann 3333333333")
+        self.assertEqual(
+            list(main.load_data(self.filename).find("Ann").phones), ["2222222222", "3333333333"]
+        )
+
+    def test_journal_belongs_to_its_book(self):
+        self.run_session("add Ann 1234567890")
+        other = os.path.join(self.tmp.name, "other.pkl")
+        self.assertEqual(len(main.load_data(other)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()